@@ -3,7 +3,10 @@
 # or tepete and pifroggi on Discord
 
 import json
-import random
+import struct
+import functools
+import itertools
+import weakref
 import vapoursynth as vs
 from numbers import Real
 
@@ -11,7 +14,24 @@ core        = vs.core
 fb_modes    = {"repeat", "mirror", "fillmargins", "fixborders"}
 cv_modes    = {"telea", "ns", "fsr"}
 markdup_reg = {}
+markdup_max = 64  # newest prop source clips kept for skipdups, older ones are dropped so long sessions don't hold every clip and its cache
 markdup_id  = 1
+props_reg   = weakref.WeakKeyDictionary()
+shifts_reg  = weakref.WeakKeyDictionary()  # backshifted clips per source clip, without the source itself so entries can be collected
+blanks_reg  = weakref.WeakKeyDictionary()  # single color pad frames per source clip, so repeated padding shares nodes
+sub_factors = (1, 2, 4, 8, 16)  # subsampling factor by log2 subsampling value
+color_props = ['_Matrix','_Transfer','_Primaries', '_ChromaLocation','_SARNum','_SARDen','_FieldBased', '_Range' if vs.__version__.release_major >= 74 else '_ColorRange']
+props_structs = {
+    "tiletools_padprops":     ("<6i",  ("orig_w", "orig_h", "pad_l", "pad_r", "pad_t", "pad_b")),
+    "tiletools_tileprops":    ("<6i?", ("tile_w", "tile_h", "overlap_w", "overlap_h", "orig_w", "orig_h", "discard")),
+    "tiletools_extendprops":  ("<2i",  ("start_pad", "end_pad")),
+    "tiletools_overlapprops": ("<4i",  ("orig_length", "window_length", "overlap", "padding")),
+}
+props_magic  = b"\xa7"  # leading byte of packed props, json props always start with "{"
+overlap_pads = {"none": 0, "mirror": 1, "loop": 2, "repeat": 3, "black": 4, "color": 5, "discard": 6}  # padding tag stored as int in the overlap props
+markdup_expr = (  # dup check for markdups over 5 previous frames as a running product of matches summed up, so the length of the unbroken run of dups, diff prop, comparison, and thresh are filled in per call
+    "N 0 > src0.{prop} {thresh} {cmp} *" + "".join(f" dup N {i} > src{i}.{{prop}} {{thresh}} {{cmp}} * *" for i in range(1, 5)) + " +" * 4)
+skipdup_expr = "x.tiletools_markprops 5 < x.tiletools_markprops N 5 % x.tiletools_markprops min ?"  # select for skipdups, if mark < 5: skip as much as possible, else (long run) throttle shift so it doesn't slide forever
 
 def _expr(clips, expr, format=None):
     if hasattr(core, "akarin"):
@@ -19,32 +39,45 @@ def _expr(clips, expr, format=None):
     else:
         return core.std.Expr(clips, expr, format=format)
 
-def _clamp8(x):
-    return max(0, min(255, x))
-
-def _check_modulus(value, subsampling, parameter, function_name, clip_format):
-    if subsampling > 1 and value % subsampling != 0:
-        raise ValueError(f"vs_tiletools.{function_name}: {parameter} must be a multiple of {subsampling} for format {clip_format.name} due to chroma subsampling.")
+@functools.lru_cache(maxsize=128)
+def _qvf(color_family, sample_type, bits_per_sample, subsampling_w, subsampling_h):
+    # cached query_video_format, the same few formats get requested for every padder instance
+    return core.query_video_format(color_family, sample_type, bits_per_sample, subsampling_w, subsampling_h)
+
+def _check_moduli(clip_format, function_name, w=(), h=()):
+    # checks (parameter, value) pairs against horizontal and vertical subsampling, returns early if there is none
+    for pairs, ss in ((w, clip_format.subsampling_w), (h, clip_format.subsampling_h)):
+        if not ss:
+            continue
+        subsampling = sub_factors[ss]
+        mask        = subsampling - 1  # subsampling is a power of 2, so a bit test replaces the modulo, non whole numbers can never be a multiple
+        for parameter, value in pairs:
+            if value != int(value) or int(value) & mask:
+                raise ValueError(f"vs_tiletools.{function_name}: {parameter} must be a multiple of {subsampling} for format {clip_format.name} due to chroma subsampling.")
 
 def _normalize_color(mode, clip_format, function_name):
     # none lets addborders pick format appropriate black
     if mode is None or (isinstance(mode, str) and mode in {"black", "none", "None"}):
         return None
 
-    # get values
-    if isinstance(mode, Real):
-        raw_vals = [float(mode)]
-    elif isinstance(mode, (list, tuple)) and len(mode) > 0 and all(isinstance(v, Real) for v in mode):
-        raw_vals = [float(v) for v in mode]
-    else:
+    # get values, anything that doesn't convert to floats is not a color
+    if isinstance(mode, str):
+        return False
+    try:
+        raw_vals = tuple(map(float, mode)) if isinstance(mode, (list, tuple)) else (float(mode),)
+    except (TypeError, ValueError):
+        return False
+    if not raw_vals:
         return False
 
-    num_planes  = clip_format.num_planes
-    sample_type = clip_format.sample_type
+    # conversion only depends on values and format, so it is cached
+    return _convert_color(raw_vals, clip_format.num_planes, clip_format.sample_type, clip_format.bits_per_sample, clip_format.color_family, function_name)
 
+@functools.lru_cache(maxsize=256)
+def _convert_color(raw_vals, num_planes, sample_type, bits_per_sample, color_family, function_name):
     # broadcast single value across planes
     if len(raw_vals) < num_planes:
-        raw_vals = raw_vals + [raw_vals[-1]] * (num_planes - len(raw_vals))
+        raw_vals = raw_vals + (raw_vals[-1],) * (num_planes - len(raw_vals))
     elif len(raw_vals) > num_planes:
         raise ValueError(f"vs_tiletools.{function_name}: Too many color values for the input format.")
 
@@ -52,24 +85,117 @@ def _normalize_color(mode, clip_format, function_name):
     if not all(0.0 <= v <= 255.0 for v in raw_vals):
         raise ValueError(f"vs_tiletools.{function_name}: Color values must be in range 0–255.")
 
-    # convert 8bit values to input clip range
+    # convert 8bit values to input clip range, tuple so the cached result can not be modified
     if sample_type == vs.INTEGER:
-        dst_max = (1 << clip_format.bits_per_sample) - 1
-        return [int(round(v * dst_max / 255.0)) for v in raw_vals]
+        dst_max = (1 << bits_per_sample) - 1
+        return tuple(int(round(v * dst_max / 255.0)) for v in raw_vals)
     if sample_type == vs.FLOAT:
-        if clip_format.color_family == vs.YUV:
-            return [raw_vals[0] / 255.0, *[(v - 128.0) / 256.0 for v in raw_vals[1:]]]
-        return [v / 255.0 for v in raw_vals]
+        if color_family == vs.YUV:
+            return (raw_vals[0] / 255.0, *[(v - 128.0) / 256.0 for v in raw_vals[1:]])
+        return tuple(v / 255.0 for v in raw_vals)
     
     # return false if not a color
     return False
 
+@functools.lru_cache(maxsize=256)
+def _encode_props(prop_key, cfg_items):
+    # packed values for keys with a fixed layout, json string otherwise, cached since scripts often write the same config many times
+    layout = props_structs.get(prop_key)
+    if layout is not None:
+        cfg = dict(cfg_items)
+        return props_magic + struct.pack(layout[0], *(cfg[k] for k in layout[1]))
+    return json.dumps(dict(cfg_items), separators=(",", ":"))
+
+def _decode_props(prop_key, raw):
+    # unpack the fixed layout if the data starts with the magic byte, else json for older props or keys without a layout
+    layout = props_structs.get(prop_key)
+    if layout is None or isinstance(raw, str) or raw[:1] != props_magic:
+        return json.loads(raw)  # takes bytes directly
+    return dict(zip(layout[1], struct.unpack(layout[0], raw[1:])))
+
+def _set_props(clip, prop_key, cfg):
+    # writes config as frame prop and also remembers it for the returned clip, so auto modes can skip get_frame
+    cfg_data = _encode_props(prop_key, tuple(cfg.items()))
+    out      = core.std.SetFrameProp(clip, prop=prop_key, data=cfg_data)  # single bytes or str value, the api wraps it itself
+    props_reg[out] = {**props_reg.get(clip, {}), prop_key: cfg}  # other known props pass through unchanged
+    return out
+
+def _get_props(clip, prop_key):
+    # reads config from registry if clip is known, else falls back to props of first frame once and remembers them, none if missing
+    known = props_reg.get(clip)
+    if known is not None and prop_key in known:
+        return known[prop_key]
+    f0 = clip.get_frame(0)
+    if prop_key not in f0.props:
+        return None
+    raw = f0.props[prop_key]
+    cfg = raw if isinstance(raw, (int, float)) else _decode_props(prop_key, raw)  # plain number props like the markdups id need no decoding
+    props_reg.setdefault(clip, {})[prop_key] = cfg
+    return cfg
+
+def _ramp_mask(clip, length):
+    # gray mask clip that brightens from 1/(length+1) to length/(length+1) over length frames, matching the format of clip
+    clip_format = clip.format
+    mask_format = _qvf(vs.GRAY, clip_format.sample_type, clip_format.bits_per_sample, 0, 0)
+    peak        = 1.0 if clip_format.sample_type == vs.FLOAT else (1 << clip_format.bits_per_sample) - 1
+
+    # with akarin the level comes from the frame number in a single expr
+    if hasattr(core, "akarin"):
+        blank = core.std.BlankClip(clip=clip, format=mask_format.id, length=length, color=[0], keep=True)
+        return core.akarin.Expr(blank, f"N 1 + {peak} * {length + 1} /")
+
+    # else splice clips with increasing brightness, std.Expr has no frame number, frames that round to the same level share one clip
+    steps = range(1, length + 1)
+    den   = length + 1
+    if clip_format.sample_type == vs.INTEGER:
+        levels = [int(round(peak * n / den)) for n in steps]
+    else:
+        levels = [n / den for n in steps]
+    blank_clip  = core.std.BlankClip
+    mask_id     = mask_format.id
+    fade_levels = [blank_clip(clip=clip, format=mask_id, length=len(list(run)), color=[v], keep=True) for v, run in itertools.groupby(levels)]
+    return core.std.Splice(fade_levels)
+
+def _fade(clipa, clipb, masks=None):
+    # blends two clips of equal length from clipa to clipb, masks is an optional dict to share ramp masks between fades of the same length
+    length = clipa.num_frames
+    if hasattr(core, "akarin"):  # per frame scalar weight, no mask needed
+        return core.akarin.Expr([clipa, clipb], f"x y x - N 1 + {length + 1} / * +")
+    mask = masks.get(length) if masks is not None else None
+    if mask is None:
+        mask = _ramp_mask(clipa, length)
+        if masks is not None:
+            masks[length] = mask
+    return _maskedmerge(clipa, clipb, mask)
+
+def _color_frame(clip, color, n):
+    # single frame of a solid color with the color props of frame n, reused for the same clip, color and frame
+    key    = (color, n)  # normalized colors are tuples or None, so they can be keys
+    blanks = blanks_reg.setdefault(clip, {})
+    blank  = blanks.get(key)
+    if blank is None:
+        blank = core.std.BlankClip(clip=clip, length=1, color=color, keep=True)
+        blank = blanks[key] = core.std.CopyFrameProps(blank, clip[n], props=color_props)  # props could be needed for format convertions
+    return blank
+
+def _remap(clip, offsets):
+    # output frame i is source frame offsets[i], a single node no matter how many frames are remapped
+    return core.std.SelectEvery(clip, cycle=clip.num_frames, offsets=offsets, modify_duration=False)
+
+def _grid(orig, tile, stride):
+    # number of tiles needed to cover orig, last tile may reach past the edge and gets padded
+    return 1 if orig <= tile else 1 + -(-(orig - tile) // stride)
+
 def _backshift(c, n):
-    # generates a list of clips, each one shifted backwards
-    shifts = [c]
-    for cur in range(1, n + 1):
-        shifts.append(c.std.DuplicateFrames([0] * cur)[:-cur])
-    return shifts
+    # generates a list of clips, each one shifted backwards, reused for the same clip so repeated calls share nodes
+    if n < 1:
+        return [c]
+    shifts = shifts_reg.get(c)
+    if shifts is None or len(shifts) < n:
+        num    = c.num_frames
+        padded = c[:1] * n + c  # first frame repeated n times in front, each shift is a window into it
+        shifts = shifts_reg[c] = [padded[n - cur:n - cur + num] for cur in range(1, n + 1)]
+    return [c] + shifts[:n]
 
 def _maskedmerge(clipa, clipb, mask):
     # makes maskedmerge work on half float formats
@@ -86,6 +212,29 @@ def _maskedmerge(clipa, clipb, mask):
         return _expr([clipa, clipb, mask], expr=["x 1 z - * y z * +"])
     return core.std.MaskedMerge(clipa, clipb, mask, first_plane=True)
 
+def _border_expr(clip, left=0, right=0, top=0, bottom=0):
+    # akarin expr per plane that takes y on the borders and x inside, border sizes scaled for subsampled planes
+    clip_format = clip.format
+    exprs = []
+    for plane in range(clip_format.num_planes):
+        ss_w = clip_format.subsampling_w if plane else 0
+        ss_h = clip_format.subsampling_h if plane else 0
+        w    = clip.width  >> ss_w
+        h    = clip.height >> ss_h
+        exprs.append(f"X {left >> ss_w} < X {w - (right >> ss_w)} >= or Y {top >> ss_h} < or Y {h - (bottom >> ss_h)} >= or y x ?")
+    return exprs
+
+def _fade_expr(clip, horizontal=True):
+    # akarin expr per plane that blends from x to y across the clip with the same linear weights as the resized gradient mask
+    clip_format = clip.format
+    exprs = []
+    for plane in range(clip_format.num_planes):
+        if horizontal:
+            exprs.append(f"x y x - X 0.5 + {clip.width >> (clip_format.subsampling_w if plane else 0)} / * +")
+        else:
+            exprs.append(f"x y x - Y 0.5 + {clip.height >> (clip_format.subsampling_h if plane else 0)} / * +")
+    return exprs
+
 def _wrap(clip, left=0, right=0, top=0, bottom=0, region="pad"):
     # wrap pixels around to create periodic tiling
     if region == "fill":
@@ -93,23 +242,26 @@ def _wrap(clip, left=0, right=0, top=0, bottom=0, region="pad"):
     elif region != "pad":
         raise ValueError("Region must be 'pad' or 'fill'.")
 
-    clip_w      = clip.width
-    clip_h      = clip.height
-    tile_l      = (left   + clip_w - 1) // clip_w
-    tile_r      = (right  + clip_w - 1) // clip_w
-    tile_t      = (top    + clip_h - 1) // clip_h
-    tile_b      = (bottom + clip_h - 1) // clip_h
-    crop_l      = tile_l * clip_w - left
-    crop_r      = tile_r * clip_w - right
-    crop_t      = tile_t * clip_h - top
-    crop_b      = tile_b * clip_h - bottom
+    clip_w = clip.width
+    clip_h = clip.height
 
+    # stack only the needed strips, full copies are only added if padding is larger than the clip
     out = clip
-    if tile_l or tile_r:
-        out = core.std.StackHorizontal([out] * (tile_l + 1 + tile_r))
-    if tile_t or tile_b:
-        out = core.std.StackVertical([out] * (tile_t + 1 + tile_b))
-    return core.std.Crop(out, left=crop_l, right=crop_r, top=crop_t, bottom=crop_b)
+    if left or right:
+        parts = [out] * (left // clip_w + 1 + right // clip_w)
+        if left % clip_w:
+            parts.insert(0, core.std.Crop(out, left=clip_w - left % clip_w))
+        if right % clip_w:
+            parts.append(core.std.Crop(out, right=clip_w - right % clip_w))
+        out = core.std.StackHorizontal(parts)
+    if top or bottom:
+        parts = [out] * (top // clip_h + 1 + bottom // clip_h)
+        if top % clip_h:
+            parts.insert(0, core.std.Crop(out, top=clip_h - top % clip_h))
+        if bottom % clip_h:
+            parts.append(core.std.Crop(out, bottom=clip_h - bottom % clip_h))
+        out = core.std.StackVertical(parts)
+    return out
 
 def _fillborders_core(clip, left=0, right=0, top=0, bottom=0, mode="mirror", pad=False):
     # uses fillborders optionally for padding
@@ -141,21 +293,42 @@ def _fillborders_core(clip, left=0, right=0, top=0, bottom=0, mode="mirror", pad
         height *= 2
     return clip
 
+def _fillborders_broken(mode, clip_format):
+    # fillmargins is broken with lower than 12bit
+    if mode == "fillmargins":
+        return clip_format.sample_type == vs.INTEGER and clip_format.bits_per_sample < 12
+    # fixborders is broken in RGB or when not 16bit
+    if mode == "fixborders":
+        return (clip_format.sample_type == vs.INTEGER and clip_format.bits_per_sample != 16) or clip_format.color_family == vs.RGB
+    return False
+
 def _fillborders(clip, left=0, right=0, top=0, bottom=0, mode="mirror", region="pad"):
     # adds support for all formats to fillborders and fixes broken modes
     if region not in ("pad", "fill"):
         raise ValueError('Region must be "pad" or "fill".')
     clip_format = clip.format
     
-    # fillmargins is broken with lower than 12bit
-    broken_fillmargins = mode == "fillmargins" and  (clip_format.sample_type == vs.INTEGER and clip_format.bits_per_sample  < 12)
-    # fixborders is broken in RGB or when not 16bit 
-    broken_fixborders  = mode == "fixborders"  and ((clip_format.sample_type == vs.INTEGER and clip_format.bits_per_sample != 16) or clip_format.color_family == vs.RGB)
-    
     # if already integer or not broken mode use directly
-    if clip_format.sample_type == vs.INTEGER and not (broken_fillmargins or broken_fixborders):
+    if clip_format.sample_type == vs.INTEGER and not _fillborders_broken(mode, clip_format):
         return _fillborders_core(clip, left=left, right=right, top=top, bottom=bottom, mode=mode, pad=region=="pad")
     
+    # repeat padding in native format by stretching the edge columns and rows, float input skips the 16bit round trip
+    if mode == "repeat" and region == "pad" and not (clip_format.subsampling_w or clip_format.subsampling_h):
+        width = clip.width
+        parts = [clip]
+        if left:
+            parts.insert(0, core.resize.Point(core.std.Crop(clip, right=width - 1), width=left, height=clip.height))
+        if right:
+            parts.append(core.resize.Point(core.std.Crop(clip, left=width - 1), width=right, height=clip.height))
+        clip   = core.std.StackHorizontal(parts) if len(parts) > 1 else clip
+        height = clip.height
+        parts  = [clip]
+        if top:
+            parts.insert(0, core.resize.Point(core.std.Crop(clip, bottom=height - 1), width=clip.width, height=top))
+        if bottom:
+            parts.append(core.resize.Point(core.std.Crop(clip, top=height - 1), width=clip.width, height=bottom))
+        return core.std.StackVertical(parts) if len(parts) > 1 else clip
+
     # if fixborders and RGB, convert to YUV and mask later
     rgb_to_yuv = mode == "fixborders" and clip_format.color_family == vs.RGB
     if rgb_to_yuv:
@@ -166,7 +339,7 @@ def _fillborders(clip, left=0, right=0, top=0, bottom=0, mode="mirror", region="
         matrix = {}
     
     # convert to 16bit, fillborders, convert back
-    clip_format_int = core.query_video_format(family, vs.INTEGER, 16, clip_format.subsampling_w, clip_format.subsampling_h)
+    clip_format_int = _qvf(family, vs.INTEGER, 16, clip_format.subsampling_w, clip_format.subsampling_h)
     clip_fill = core.resize.Point(clip, format=clip_format_int.id, **matrix)
     clip_fill = _fillborders_core(clip_fill, left=left, right=right, top=top, bottom=bottom, mode=mode, pad=region=="pad")
     clip_fill = core.resize.Point(clip_fill, format=clip_format.id)
@@ -176,7 +349,9 @@ def _fillborders(clip, left=0, right=0, top=0, bottom=0, mode="mirror", region="
     # keep original values inside, use filled border outside
     if region == "pad":
         clip = core.std.AddBorders(clip, left=left, right=right, top=top, bottom=bottom)
-    mask_format = core.query_video_format(vs.GRAY, clip_format.sample_type, clip_format.bits_per_sample, 0, 0)
+    if hasattr(core, "akarin"):  # select by pixel position in a single pass instead of building and merging a mask
+        return core.akarin.Expr([clip, clip_fill], _border_expr(clip, left=left, right=right, top=top, bottom=bottom))
+    mask_format = _qvf(vs.GRAY, clip_format.sample_type, clip_format.bits_per_sample, 0, 0)
     mask = core.std.BlankClip(clip, format=mask_format.id, width=clip.width - left - right, height=clip.height - top - bottom, color=0, keep=True)
     whit = 1.0 if mask_format.sample_type == vs.FLOAT else (1 << mask_format.bits_per_sample) - 1
     mask = core.std.AddBorders(mask, left=left, right=right, top=top, bottom=bottom, color=whit)
@@ -218,19 +393,16 @@ def _cv_inpaint(clip, left=0, right=0, top=0, bottom=0, mode="telea", region="pa
         clip = inpaint(clip, mask)
         return clip
     
-    clip_inpaint = clip
-    
-    # add 709 matrix prop for rgb roundtrip if input is yuv
-    if clip_format.color_family == vs.YUV:
-        clip_inpaint = core.std.SetFrameProps(clip_inpaint, _Matrix=vs.MATRIX_BT709)
+    # use 709 matrix for rgb roundtrip if input is yuv
+    matrix = {"matrix_in_s": "709"} if clip_format.color_family == vs.YUV else {}
 
     # convert to 8bit rgb or gray
     if clip_format.color_family == vs.GRAY:
-        clip_inpaint = core.resize.Point(clip_inpaint, format=vs.GRAY8)
+        clip_inpaint = core.resize.Point(clip, format=vs.GRAY8)
     elif clip_format.subsampling_w > 0 or clip_format.subsampling_h > 0:
-        clip_inpaint = core.resize.Bilinear(clip_inpaint, format=vs.RGB24)  # usample chroma bilinear if subsampled
+        clip_inpaint = core.resize.Bilinear(clip, format=vs.RGB24, **matrix)  # usample chroma bilinear if subsampled
     else:
-        clip_inpaint = core.resize.Point(clip_inpaint, format=vs.RGB24)
+        clip_inpaint = core.resize.Point(clip, format=vs.RGB24, **matrix)
 
     # pad clips
     if region == "pad":
@@ -240,39 +412,76 @@ def _cv_inpaint(clip, left=0, right=0, top=0, bottom=0, mode="telea", region="pa
     # inpaint
     clip_inpaint = inpaint(clip_inpaint, mask)
     
-    # convert back
+    # convert back, kernel only matters if chroma needs downsampling
+    resize = core.resize.Bilinear if (clip_format.subsampling_w or clip_format.subsampling_h) else core.resize.Point
     if clip_format.color_family == vs.YUV:
-        clip_inpaint = core.resize.Bilinear(clip_inpaint, format=clip_format.id, matrix_s="709")  # output props are from base clip to fixed matrix is okay here
+        clip_inpaint = resize(clip_inpaint, format=clip_format.id, matrix_s="709")  # output props are from base clip to fixed matrix is okay here
     else:
-        clip_inpaint = core.resize.Bilinear(clip_inpaint, format=clip_format.id)
+        clip_inpaint = resize(clip_inpaint, format=clip_format.id)
     
     # keep original inside, use outpainted border outside
-    mask_format = core.query_video_format(vs.GRAY, clip_format.sample_type, clip_format.bits_per_sample, 0, 0)
+    mask_format = _qvf(vs.GRAY, clip_format.sample_type, clip_format.bits_per_sample, 0, 0)
     mask = core.resize.Point(mask, format=mask_format.id, range_in_s="full")  # set range_in to avoid out of range values if this converts to float
     return _maskedmerge(clip, clip_inpaint, mask)
 
-def _pad_core(clip, left=0, right=0, top=0, bottom=0, mode="mirror", write_props=False):
-    # pads and optionally writes padprops
+def _crop_values(clip, left=0, right=0, top=0, bottom=0, color_low=(0, 0, 0), color_high=(255, 255, 255)):
+    # numpy fallback for acrop.CropValues, writes the same props so autofill can read them either way
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("vs_tiletools.autofill: Requires either the autocrop plugin or numpy.") from None
+    clip_format = clip.format
+    shift       = clip_format.bits_per_sample - 8
+    ss_w        = clip_format.subsampling_w
+    ss_h        = clip_format.subsampling_h
+    low         = [int(v) << shift for v in color_low]                # bottom of the 8 bit step, values are never negative so int rounds down
+    high        = [((int(v) + 1) << shift) - 1 for v in color_high]   # top of the 8 bit step, so 255 covers the full range like acrop
+
+    def _leading(inside, limit, step):
+        # number of border lines from the edge, capped by the maximum and kept a multiple of the subsampling
+        inside = inside[:limit]
+        n      = len(inside) if inside.all() else int(inside.argmin())
+        return n - n % step
+
+    def _detect(n, f):
+        # a row or column is border if every pixel in every plane is inside the color range
+        rows = cols = None
+        for plane in range(clip_format.num_planes):
+            a      = np.asarray(f[plane])
+            inside = (a >= low[plane]) & (a <= high[plane])
+            r      = inside.all(axis=1)
+            c      = inside.all(axis=0)
+            if plane:
+                r = np.repeat(r, sub_factors[ss_h])
+                c = np.repeat(c, sub_factors[ss_w])
+            rows = r if rows is None else rows & r
+            cols = c if cols is None else cols & c
+        fout = f.copy()
+        fout.props["CropTopValue"]    = _leading(rows,       top,    sub_factors[ss_h])
+        fout.props["CropBottomValue"] = _leading(rows[::-1], bottom, sub_factors[ss_h])
+        fout.props["CropLeftValue"]   = _leading(cols,       left,   sub_factors[ss_w])
+        fout.props["CropRightValue"]  = _leading(cols[::-1], right,  sub_factors[ss_w])
+        return fout
+
+    return core.std.ModifyFrame(clip, clip, _detect)
+
+def _pad_core(clip, left=0, right=0, top=0, bottom=0, mode="mirror", write_props=False, color=False):
+    # pads and optionally writes padprops, color can be passed already normalized for solid color modes
     
     left, right, top, bottom = int(left), int(right), int(top), int(bottom)
     clip_format = clip.format
     orig_w      = clip.width
     orig_h      = clip.height
-    sub_w       = 1 << (clip_format.subsampling_w or 0)
-    sub_h       = 1 << (clip_format.subsampling_h or 0)
     prop_key    = "tiletools_padprops"
 
-    if min(left, right, top, bottom) < 0:
+    if left < 0 or right < 0 or top < 0 or bottom < 0:
         raise ValueError("vs_tiletools.pad: Padding values cannot be negative.")
 
     # check subsampling
-    _check_modulus(left,  sub_w, "Left padding",  "pad", clip_format)
-    _check_modulus(right, sub_w, "Right padding", "pad", clip_format)
-    _check_modulus(top,   sub_h, "Top padding",   "pad", clip_format)
-    _check_modulus(bottom,sub_h, "Bottom padding","pad", clip_format)
+    _check_moduli(clip_format, "pad", w=(("Left padding", left), ("Right padding", right)), h=(("Top padding", top), ("Bottom padding", bottom)))
 
     # if padding is 0, skip padding but still set props if true, so auto crop doesn't throw an error
-    if not any((left, right, top, bottom)):
+    if (left | right | top | bottom) == 0:
         out = clip
 
     # fillborder modes
@@ -289,7 +498,8 @@ def _pad_core(clip, left=0, right=0, top=0, bottom=0, mode="mirror", write_props
 
     # solid color
     else:
-        color = _normalize_color(mode, clip_format, "pad")
+        if color is False:
+            color = _normalize_color(mode, clip_format, "pad")
         if color is False:
             raise TypeError("vs_tiletools.pad: Mode must be 'mirror', 'wrap', 'repeat', 'fillmargins', 'fixborders', 'telea', 'ns', 'fsr', 'black', or custom color values [128, 128, 128].")
         out = core.std.AddBorders(clip, left=left, right=right, top=top, bottom=bottom, color=color)
@@ -297,16 +507,18 @@ def _pad_core(clip, left=0, right=0, top=0, bottom=0, mode="mirror", write_props
     # pad props for auto crop
     if write_props:
         cfg = dict(orig_w=int(orig_w), orig_h=int(orig_h), pad_l=int(left), pad_r=int(right), pad_t=int(top), pad_b=int(bottom))
-        cfg_str = json.dumps(cfg, separators=(",", ":"))
-        return core.std.SetFrameProp(out, prop=prop_key, data=[cfg_str])
+        if out is clip and props_reg.get(clip, {}).get(prop_key) == cfg:  # clip already carries these exact props, no need for another node
+            return clip
+        return _set_props(out, prop_key, cfg)
     return out
 
 def _extend_core(clip, start=0, end=0, length=None, mode="mirror", write_props=False):
+    num = clip.num_frames
     if length is not None and (start or end):
         raise ValueError("vs_tiletools.extend: Use either start and end to add that number of frames, or length to pad to an absolute length.")
     if length is not None and length < 1:
         raise ValueError("vs_tiletools.extend: Length must be at least 1.")
-    if length is not None and length < clip.num_frames:
+    if length is not None and length < num:
         raise ValueError("vs_tiletools.extend: Length can not be shorter than the input clip.")
     if start < 0 or end < 0:
         raise ValueError("vs_tiletools.extend: Start or end can not be negative.")
@@ -314,93 +526,45 @@ def _extend_core(clip, start=0, end=0, length=None, mode="mirror", write_props=F
     # determine how many frames to add
     if length is not None:
         add_start = 0
-        add_end   = max(0, length - clip.num_frames)
+        add_end   = max(0, length - num)
     else:
         add_start = int(start)
         add_end   = int(end)
 
-    color_props = ['_Matrix','_Transfer','_Primaries', '_ChromaLocation','_SARNum','_SARDen','_FieldBased', '_Range' if vs.__version__.release_major >= 74 else '_ColorRange']
     prop_key    = "tiletools_extendprops"
     pad_mode    = mode
     out         = clip
 
-    def _end_pad(clip, n):
-        # mirror clip
-        if pad_mode == "mirror":
-            if clip.num_frames == 1:
-                return core.std.Loop(clip, times=n)
-            reverse  = core.std.Reverse(clip[:-1])  # trim to avoid duplicates
-            forward  = clip[1:]                     # trim to avoid duplicates
-            pingpong = reverse + forward
-            repeats  = (n + pingpong.num_frames - 1) // max(1, pingpong.num_frames)
-            return (pingpong * repeats)[:n]
-        
-        # loop clip
-        if pad_mode == "loop":
-            if clip.num_frames == 1:
-                return core.std.Loop(clip, times=n)
-            repeats = (n + clip.num_frames - 1) // max(1, clip.num_frames)
-            return (clip * repeats)[:n]
-        
-        # repeat last frame
-        if pad_mode == "repeat":
-            last = core.std.Trim(clip, first=clip.num_frames - 1, length=1)
-            return core.std.Loop(last, times=n)
-        
-        # solid color
-        color = _normalize_color(pad_mode, clip.format, "extend")
-        if color is False:
-            raise ValueError("vs_tiletools.extend: Mode must be 'mirror', 'loop', 'repeat', 'black', or a custom color like [128, 128, 128].")
-        blank = core.std.BlankClip(clip=clip, length=n, color=color, keep=True)
-        last1 = core.std.Trim(clip, first=clip.num_frames - 1, length=1)
-        return core.std.CopyFrameProps(blank, last1, props=color_props) # props could be needed for format convertions
+    # mirror clip, reflect every output position into the source without repeating the end frames
+    if isinstance(pad_mode, str) and pad_mode == "mirror":
+        if add_start or add_end:
+            period = max(1, 2 * (num - 1))
+            out    = _remap(clip, [t if t < num else period - t for t in (p % period for p in range(-add_start, num + add_end))])
 
-    def _start_pad(clip, n):
-        # mirror clip
-        if pad_mode == "mirror":
-            if clip.num_frames == 1:
-                return core.std.Loop(clip, times=n)
-            forward  = clip[1:]                     # trim to avoid duplicates
-            reverse  = core.std.Reverse(clip[:-1])  # trim to avoid duplicates
-            pingpong = forward + reverse
-            repeats  = (n + pingpong.num_frames - 1) // max(1, pingpong.num_frames)
-            trimmed  = (pingpong * repeats)[:n]
-            return core.std.Reverse(trimmed)
-        
-        # loop clip
-        if pad_mode == "loop":
-            if clip.num_frames == 1:
-                return core.std.Loop(clip, times=n)
-            repeats = (n + clip.num_frames - 1) // max(1, clip.num_frames)
-            looped  = clip * repeats
-            return core.std.Trim(looped, first=looped.num_frames - n, length=n)
-        
-        # repeat first frame
-        if pad_mode == "repeat":
-            first = core.std.Trim(clip, first=0, length=1)
-            return core.std.Loop(first, times=n)
-        
-        # solid color
+    # loop clip, every output position wraps around into the source, so long padding is still a single node instead of many splices
+    elif isinstance(pad_mode, str) and pad_mode == "loop":
+        if add_start or add_end:
+            out    = _remap(clip, [p % num for p in range(-add_start, num + add_end)])
+
+    # repeat first and last frame, clamping every output position into the source
+    elif isinstance(pad_mode, str) and pad_mode == "repeat":
+        if add_start or add_end:
+            out    = _remap(clip, [min(max(p, 0), num - 1) for p in range(-add_start, num + add_end)])
+
+    # solid color, props are copied once and the frame is looped instead of copying for every padded frame
+    else:
         color = _normalize_color(pad_mode, clip.format, "extend")
         if color is False:
             raise ValueError("vs_tiletools.extend: Mode must be 'mirror', 'loop', 'repeat', 'black', or a custom color like [128, 128, 128].")
-        blank = core.std.BlankClip(clip=clip, length=n, color=color, keep=True)
-        first1 = core.std.Trim(clip, first=0, length=1)
-        return core.std.CopyFrameProps(blank, first1, props=color_props) # props could be needed for format convertions
-    
-    # pad
-    if add_start > 0:
-        head = _start_pad(clip, add_start)
-        out  = head + out
-    if add_end > 0:
-        tail = _end_pad(clip, add_end)
-        out  = out + tail
+        if add_start > 0:
+            out  = core.std.Loop(_color_frame(clip, color, 0), times=add_start) + out
+        if add_end > 0:
+            out  = out + core.std.Loop(_color_frame(clip, color, -1), times=add_end)
 
     # set frame props for autotrim
     if write_props:
         cfg = dict(start_pad=int(add_start), end_pad=int(add_end))
-        cfg_str = json.dumps(cfg, separators=(",", ":"))
-        return core.std.SetFrameProp(out, prop=prop_key, data=[cfg_str])
+        return _set_props(out, prop_key, cfg)
     return out
     
     
@@ -445,8 +609,6 @@ def crop(clip, left=None, right=None, top=None, bottom=None):
     clip_format = clip.format
     width       = clip.width
     height      = clip.height
-    sub_w       = 1 << (clip_format.subsampling_w or 0)
-    sub_h       = 1 << (clip_format.subsampling_h or 0)
     prop_key    = "tiletools_padprops"
     manual      = any(v is not None for v in (left, right, top, bottom))
 
@@ -456,18 +618,16 @@ def crop(clip, left=None, right=None, top=None, bottom=None):
         right  = 0 if right  is None else int(right)
         top    = 0 if top    is None else int(top)
         bottom = 0 if bottom is None else int(bottom)
-        if min(left, right, top, bottom) < 0:
+        if left < 0 or right < 0 or top < 0 or bottom < 0:
             raise ValueError("vs_tiletools.crop: Crop values can not be negative.")
 
     # auto crop
     else:
-        f0 = clip.get_frame(0)
-        if prop_key not in f0.props:
+        cfg = _get_props(clip, prop_key)
+        if cfg is None:
             raise KeyError("vs_tiletools.crop: Clip has no pad props. Did you pass the right clip? Were frame props deleted? You can also crop manually.")
 
         # stored pad props
-        raw    = f0.props[prop_key]
-        cfg    = json.loads(raw.decode() if isinstance(raw, (bytes, bytearray)) else raw)
         orig_w = int(cfg["orig_w"])
         orig_h = int(cfg["orig_h"])
         pad_l  = int(cfg["pad_l"])
@@ -486,14 +646,11 @@ def crop(clip, left=None, right=None, top=None, bottom=None):
         bottom        = int(round(pad_b * scale_y))
 
     # if pad is 0, just remove the props and return
-    if not any((left, right, top, bottom)):
+    if (left | right | top | bottom) == 0:
         return core.std.RemoveFrameProps(clip, props=[prop_key])
 
     # check subsampling
-    _check_modulus(left,   sub_w, "Left crop",   "crop", clip_format)
-    _check_modulus(right,  sub_w, "Right crop",  "crop", clip_format)
-    _check_modulus(top,    sub_h, "Top crop",    "crop", clip_format)
-    _check_modulus(bottom, sub_h, "Bottom crop", "crop", clip_format)
+    _check_moduli(clip_format, "crop", w=(("Left crop", left), ("Right crop", right)), h=(("Top crop", top), ("Bottom crop", bottom)))
 
     # frame bounds
     if left + right >= width or top + bottom >= height:
@@ -529,12 +686,9 @@ def mod(clip, modulus=64, mode="mirror"):
     clip_format = clip.format
     width       = clip.width
     height      = clip.height
-    sub_w       = 1 << (clip_format.subsampling_w or 0)
-    sub_h       = 1 << (clip_format.subsampling_h or 0)
 
     # make sure modulus works with chroma subsampling
-    _check_modulus(mod_w, sub_w, "Modulus", "mod", clip_format)
-    _check_modulus(mod_h, sub_h, "Modulus", "mod", clip_format)
+    _check_moduli(clip_format, "mod", w=(("Modulus", mod_w),), h=(("Modulus", mod_h),))
 
     # crop to next lower multiple
     if isinstance(mode, str) and mode == "discard":
@@ -543,18 +697,21 @@ def mod(clip, modulus=64, mode="mirror"):
         
         crop_r = width  % mod_w
         crop_b = height % mod_h
-        if not any((crop_r, crop_b)):
+        if (crop_r | crop_b) == 0:
             return clip
         return core.std.Crop(clip, right=crop_r, bottom=crop_b)
 
-    # check if pad mode is valid
-    if not ((isinstance(mode, str) and (mode in fb_modes or mode in cv_modes or mode == "wrap")) or (_normalize_color(mode, clip_format, "mod") is not False)):
-        raise TypeError("vs_tiletools.mod: Mode must be 'mirror', 'wrap', 'repeat', 'fillmargins', 'fixborders', 'telea', 'ns', 'fsr', 'black', custom color values [128, 128, 128], or 'discard'.")
+    # check if pad mode is valid, keep normalized color so padding doesn't normalize it again
+    color = False
+    if not (isinstance(mode, str) and (mode in fb_modes or mode in cv_modes or mode == "wrap")):
+        color = _normalize_color(mode, clip_format, "mod")
+        if color is False:
+            raise TypeError("vs_tiletools.mod: Mode must be 'mirror', 'wrap', 'repeat', 'fillmargins', 'fixborders', 'telea', 'ns', 'fsr', 'black', custom color values [128, 128, 128], or 'discard'.")
 
     # pad to next upper multiple
     pad_w  = (-width)  % mod_w
     pad_h  = (-height) % mod_h
-    return _pad_core(clip, right=pad_w, bottom=pad_h, mode=mode, write_props=True)  # call even if pad is 0, so props are written and auto crop still works 
+    return _pad_core(clip, right=pad_w, bottom=pad_h, mode=mode, write_props=True, color=color)  # call even if pad is 0, so props are written and auto crop still works 
 
 
 def inpaint(clip, mask, mode="telea"):
@@ -588,14 +745,15 @@ def inpaint(clip, mask, mode="telea"):
     mask = core.std.BinarizeMask(mask)
     
     # loop last frame or trim to match clip length
-    if clip.num_frames < mask.num_frames:
-        mask = core.std.Trim(mask, length=clip.num_frames)
-    elif clip.num_frames > mask.num_frames:
-        if mask.num_frames == 1:
-            mask = core.std.Loop(mask, times=clip.num_frames)
+    num, mask_num = clip.num_frames, mask.num_frames
+    if num < mask_num:
+        mask = mask[:num]
+    elif num > mask_num:
+        if mask_num == 1:
+            mask = core.std.Loop(mask, times=num)
         else:
-            last = core.std.Trim(mask, first=mask.num_frames - 1, length=1)
-            mask = mask + core.std.Loop(last, times=clip.num_frames - mask.num_frames)
+            last = mask[-1]
+            mask = mask + core.std.Loop(last, times=num - mask_num)
 
     # inpaint
     if isinstance(mode, str) and (mode in cv_modes or mode == "shiftmap"):
@@ -625,10 +783,8 @@ def fill(clip, left=0, right=0, top=0, bottom=0, mode="mirror"):
     clip_format = clip.format
     width       = clip.width
     height      = clip.height
-    sub_w       = 1 << (clip_format.subsampling_w or 0)
-    sub_h       = 1 << (clip_format.subsampling_h or 0)
 
-    if min(left, right, top, bottom) < 0:
+    if left < 0 or right < 0 or top < 0 or bottom < 0:
         raise ValueError("vs_tiletools.fill: Fill amount can not be negative.")
     if left + right >= width or top + bottom >= height:
         raise ValueError("vs_tiletools.fill: Fill amount must be smaller than clip dimensions.")
@@ -636,13 +792,10 @@ def fill(clip, left=0, right=0, top=0, bottom=0, mode="mirror"):
         raise ValueError("vs_tiletools.fill: Fill amount must be less than half of the clip dimensions for mode 'mirror'.")
 
     # check subsampling
-    _check_modulus(left,  sub_w, "Left fill amount",  "fill", clip_format)
-    _check_modulus(right, sub_w, "Right fill amount", "fill", clip_format)
-    _check_modulus(top,   sub_h, "Top fill amount",   "fill", clip_format)
-    _check_modulus(bottom,sub_h, "Bottom fill amount","fill", clip_format)
+    _check_moduli(clip_format, "fill", w=(("Left fill amount", left), ("Right fill amount", right)), h=(("Top fill amount", top), ("Bottom fill amount", bottom)))
 
     # if fill amount is 0, skip filling
-    if not any((left, right, top, bottom)):
+    if (left | right | top | bottom) == 0:
         return clip
 
     # fillborder modes
@@ -711,40 +864,53 @@ def autofill(clip, left=0, right=0, top=0, bottom=0, offset=0, color=[16, 128, 1
     tol_y, tol_u, tol_v = tol
 
     # checks
-    if min(left, right, top, bottom) < 0:
+    if left < 0 or right < 0 or top < 0 or bottom < 0:
         raise ValueError("vs_tiletools.autofill: Max fill values can not be negative.")
-    if not any((left, right, top, bottom)):
+    if (left | right | top | bottom) == 0:
         return clip
 
     # check subsampling
-    sub_w = 1 << (clip_format.subsampling_w or 0)
-    sub_h = 1 << (clip_format.subsampling_h or 0)
-    _check_modulus(left,        sub_w, "Left maximum",   "autofill", clip_format)
-    _check_modulus(right,       sub_w, "Right maximum",  "autofill", clip_format)
-    _check_modulus(top,         sub_h, "Top maximum",    "autofill", clip_format)
-    _check_modulus(bottom,      sub_h, "Bottom maximum", "autofill", clip_format)
-    _check_modulus(abs(offset), sub_w, "Offset",         "autofill", clip_format)
-    _check_modulus(abs(offset), sub_h, "Offset",         "autofill", clip_format)
+    _check_moduli(clip_format, "autofill", w=(("Left maximum", left), ("Right maximum", right), ("Offset", abs(offset))), h=(("Top maximum", top), ("Bottom maximum", bottom), ("Offset", abs(offset))))
 
     # convert to integer if needed
     if clip_format.sample_type != vs.INTEGER:
-        clip_format_int = core.query_video_format(clip_format.color_family, vs.INTEGER, 16, clip_format.subsampling_w, clip_format.subsampling_h)
+        clip_format_int = _qvf(clip_format.color_family, vs.INTEGER, 16, clip_format.subsampling_w, clip_format.subsampling_h)
         clip = core.resize.Point(clip, format=clip_format_int.id)
 
     # compute fill amount
     y, u, v    = map(int, color)  # no color nomalization needed, cropvalues plugin takes 8bit directly and scales
-    color_low  = [_clamp8(y - tol_y), _clamp8(u - tol_u), _clamp8(v - tol_v)]
-    color_high = [_clamp8(y + tol_y), _clamp8(u + tol_u), _clamp8(v + tol_v)]
-    clip       = core.acrop.CropValues(clip, top=top, bottom=bottom, left=left, right=right, color=color_low, color_second=color_high)
+    color_low  = [max(0, c - t) for c, t in zip((y, u, v), (tol_y, tol_u, tol_v))]    # color is checked to be in 0-255 and tol to be positive, so each side
+    color_high = [min(255, c + t) for c, t in zip((y, u, v), (tol_y, tol_u, tol_v))]  # can only leave the 8bit range in one direction
+    if hasattr(core, "acrop"):
+        bounds = dict(color=color_low) if color_low == color_high else dict(color=color_low, color_second=color_high)  # zero tolerance matches one exact color, no range compare needed
+        clip   = core.acrop.CropValues(clip, top=top, bottom=bottom, left=left, right=right, **bounds)
+    else:
+        clip = _crop_values(clip, top=top, bottom=bottom, left=left, right=right, color_low=color_low, color_high=color_high)
 
     # fill mode or solid color
     fb = isinstance(fill, str) and fill in fb_modes
     cv = isinstance(fill, str) and fill in cv_modes
+    if fb and _fillborders_broken(fill, clip.format):  # fill on one shared 16bit working clip instead of converting for every border size
+        clip_format_int = _qvf(vs.YUV, vs.INTEGER, 16, clip_format.subsampling_w, clip_format.subsampling_h)
+        clip = core.resize.Point(clip, format=clip_format_int.id)
     if not fb and not cv:
         fill_color = _normalize_color(fill, clip.format, "autofill")
         if fill_color is False:
             raise TypeError("vs_tiletools.autofill: Fill must be 'mirror', 'repeat', 'fillmargins', 'fixborders', 'telea', 'ns', 'fsr', 'black', or custom color values [128, 128, 128].")
 
+    @functools.lru_cache(maxsize=64)
+    def _build(l, r, t, b):
+        # borders are usually stable over many frames, so each fill graph is only built once
+        if (t | b | l | r) == 0:
+            return clip
+        elif fb:
+            return core.fb.FillBorders(clip, left=l, right=r, top=t, bottom=b, mode=fill)
+        elif cv:
+            return _cv_inpaint(clip,  left=l, right=r, top=t, bottom=b, mode=fill, region="fill")
+        else:
+            cropped = core.std.Crop(clip, left=l, right=r, top=t, bottom=b)
+            return core.std.AddBorders(cropped, left=l, right=r, top=t, bottom=b, color=fill_color)
+
     def _fill(n, f):
         # get values
         p = f.props
@@ -761,20 +927,12 @@ def autofill(clip, left=0, right=0, top=0, bottom=0, offset=0, color=[16, 128, 1
             if r > 0: r = max(0, r + offset)
     
         # fill
-        if (t | b | l | r) == 0:
-            return clip
-        elif fb:
-            return _fillborders(clip, left=l, right=r, top=t, bottom=b, mode=fill, region="fill")
-        elif cv:
-            return _cv_inpaint(clip,  left=l, right=r, top=t, bottom=b, mode=fill, region="fill")
-        else:
-            cropped = core.std.Crop(clip, left=l, right=r, top=t, bottom=b)
-            return core.std.AddBorders(cropped, left=l, right=r, top=t, bottom=b, color=fill_color)
+        return _build(l, r, t, b)
         
     out = core.std.FrameEval(clip, _fill, prop_src=[clip], clip_src=[clip])
 
     # convert back to original format if needed
-    if clip_format.sample_type != vs.INTEGER:
+    if out.format.id != clip_format.id:
         return core.resize.Point(out, format=clip_format.id)
     return out
 
@@ -802,20 +960,23 @@ def croprandom(clip, width=256, height=256, seed=0):
     clip_format = clip.format
 
     # check subsampling
-    sub_w = 1 << (clip_format.subsampling_w or 0)
-    sub_h = 1 << (clip_format.subsampling_h or 0)
-    _check_modulus(width,  sub_w, "Crop width",  "croprandom", clip_format)
-    _check_modulus(height, sub_h, "Crop height", "croprandom", clip_format)
+    sub_w = sub_factors[clip_format.subsampling_w]
+    sub_h = sub_factors[clip_format.subsampling_h]
+    _check_moduli(clip_format, "croprandom", w=(("Crop width", width),), h=(("Crop height", height),))
 
     # crop with repositioned crop window each frame
-    max_left = clip.width  - width
-    max_top  = clip.height - height
+    steps_x  = (clip.width  - width)  // sub_w + 1  # possible crop positions
+    steps_y  = (clip.height - height) // sub_h + 1
     base     = core.std.BlankClip(clip, width=width, height=height, keep=True)
 
     def _crop(n) -> vs.VideoNode:
-        rng  = random.Random(seed ^ (n * 0x9E3779B1))
-        left = rng.randrange(0, max_left + 1, sub_w)
-        top  = rng.randrange(0, max_top  + 1, sub_h)
+        # splitmix64 hash of seed and frame number, low and high half pick the position
+        x = (seed ^ (n * 0x9E3779B97F4A7C15)) & 0xFFFFFFFFFFFFFFFF
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E7B5) & 0xFFFFFFFFFFFFFFFF
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        x ^= x >> 31
+        left = (((x & 0xFFFFFFFF) * steps_x) >> 32) * sub_w
+        top  = (((x >> 32)        * steps_y) >> 32) * sub_h
         return core.std.CropAbs(clip, width=width, height=height, left=left, top=top)
 
     return core.std.FrameEval(base, _crop, clip_src=[clip])
@@ -855,22 +1016,20 @@ def tile(clip, width=256, height=256, overlap=16, padding="mirror"):
         raise ValueError("vs_tiletools.tile: Overlap must be smaller than tile size.")
 
     clip_format = clip.format
+    orig_clip   = clip
     orig_width  = clip.width
     orig_height = clip.height
     stride_x    = width  - overlap_width
     stride_y    = height - overlap_height
-    sub_w       = 1 << clip_format.subsampling_w
-    sub_h       = 1 << clip_format.subsampling_h
     max_tiles   = 1024
     
     # subsampling checks
-    _check_modulus(width, sub_w, "Width", "tile", clip_format)
-    _check_modulus(height, sub_h, "Height", "tile", clip_format)
-    _check_modulus(overlap_width, sub_w, "Overlap", "tile", clip_format)
-    _check_modulus(overlap_height, sub_h, "Overlap", "tile", clip_format)
+    _check_moduli(clip_format, "tile", w=(("Width", width), ("Overlap", overlap_width)), h=(("Height", height), ("Overlap", overlap_height)))
 
     # padding
-    discard = isinstance(padding, str) and padding == "discard"
+    discard   = isinstance(padding, str) and padding == "discard"
+    pad_color = False
+    local_pad = False
     if discard:
         # crop to discard tiles that are smaller than tile size
         if orig_width < width or orig_height < height:
@@ -890,8 +1049,8 @@ def tile(clip, width=256, height=256, overlap=16, padding="mirror"):
             raise TypeError("vs_tiletools.tile: Padding must be 'mirror', 'wrap', 'repeat', 'fillmargins', 'fixborders', 'telea', 'ns', 'fsr', 'discard', 'black', or color values [128, 128, 128].")
     
         # pad tiles that are smaller than tile size
-        tiles_x          = 1 + (0 if orig_width  <= width  else (orig_width  - width  + stride_x - 1) // stride_x)
-        tiles_y          = 1 + (0 if orig_height <= height else (orig_height - height + stride_y - 1) // stride_y)
+        tiles_x          = _grid(orig_width,  width,  stride_x)
+        tiles_y          = _grid(orig_height, height, stride_y)
         num_tiles        = tiles_x * tiles_y
         if num_tiles > max_tiles:
             raise ValueError(f"vs_tiletools.tile: This would create {num_tiles} tiles per frame (max {max_tiles}). Reduce overlap or increase tile size.")
@@ -900,18 +1059,35 @@ def tile(clip, width=256, height=256, overlap=16, padding="mirror"):
         pad_r            = assembled_width  - orig_width
         pad_b            = assembled_height - orig_height
         if pad_r or pad_b:
-            clip = _pad_core(clip, right=pad_r, bottom=pad_b, mode=padding, write_props=False)
+            # solid colors, repeat, and mirror with enough pixels inside the edge tiles give the same result when only the edge tiles are padded
+            if not isinstance(padding, str) or padding == "black":
+                pad_color = _normalize_color(padding, clip_format, "tile")
+            local_pad = pad_color is not False or padding == "repeat" or (padding == "mirror" and width - pad_r >= pad_r and height - pad_b >= pad_b)
+            if not local_pad:
+                clip = _pad_core(clip, right=pad_r, bottom=pad_b, mode=padding, write_props=False)
+
+    def _tile(left, top):
+        # crop a single tile, edge tiles reaching past the frame are padded here if padding is local
+        w_in = min(width,  clip.width  - left)
+        h_in = min(height, clip.height - top)
+        if w_in == width and h_in == height:
+            return core.std.CropAbs(clip, width=width, height=height, left=left, top=top)
+        part = clip if (w_in == clip.width and h_in == clip.height) else core.std.CropAbs(clip, width=w_in, height=h_in, left=left, top=top)
+        return _pad_core(part, right=width - w_in, bottom=height - h_in, mode=padding, color=pad_color)
 
     # create tiles via cropping in row-major order
-    tiles = []
-    stride_y_eff = height - overlap_height
-    stride_x_eff = width  - overlap_width
-    for j in range(tiles_y):
-        top = j * stride_y_eff
-        for i in range(tiles_x):
-            left = i * stride_x_eff
-            tiles.append(core.std.CropAbs(clip, width=width, height=height, left=left, top=top))
-    out = core.std.Interleave(tiles, modify_duration=False)
+    if num_tiles == 1:  # single tile needs no interleave, and no crop if it already covers the frame
+        out = clip if (clip.width == width and clip.height == height) else _tile(0, 0)
+    else:
+        if clip is not orig_clip:  # all tiles of a frame request the same source frame, always keep it cached, but leave the caller's clip alone
+            core.std.SetVideoCache(clip, mode=1)  # changes the node in place
+        xs       = range(0, tiles_x * stride_x, stride_x)  # left offset of each tile column
+        ys       = range(0, tiles_y * stride_y, stride_y)  # top offset of each tile row
+        last_x   = clip.width  - width                     # tiles starting up to here lie fully inside and are cropped directly, only edge tiles go through _tile
+        last_y   = clip.height - height
+        crop_abs = core.std.CropAbs
+        tiles    = [crop_abs(clip, width=width, height=height, left=left, top=top) if left <= last_x and top <= last_y else _tile(left, top) for top in ys for left in xs]
+        out      = core.std.Interleave(tiles, modify_duration=False)
 
     # add frame props for untile
     prop_key = "tiletools_tileprops"
@@ -924,8 +1100,7 @@ def tile(clip, width=256, height=256, overlap=16, padding="mirror"):
         orig_h    = int(orig_height),
         discard   = bool(discard),
     )
-    cfg_str = json.dumps(cfg, separators=(",", ":"))
-    return core.std.SetFrameProp(out, prop=prop_key, data=[cfg_str])
+    return _set_props(out, prop_key, cfg)
 
 
 def untile(clip, fade=False, full_width=None, full_height=None, overlap=None):
@@ -933,7 +1108,8 @@ def untile(clip, fade=False, full_width=None, full_height=None, overlap=None):
 
     Args:
         clip: Tiled clip. Any format.
-        fade: If False, crop overlaps. If True, feather/blend across overlaps.
+        fade: If False, crop overlaps. If True, feather/blend across overlaps. If `inner`, discard the outer half of the overlaps
+            and only blend across the middle half.
         full_width: Manual mode: Full assembled frame width. `None` means auto-detect.
         full_height: Manual mode: Full assembled frame height. `None` means auto-detect.
         overlap: Manual mode: Overlap between tiles. `None` means auto-detect.
@@ -949,14 +1125,17 @@ def untile(clip, fade=False, full_width=None, full_height=None, overlap=None):
         raise TypeError("vs_tiletools.untile: Clip must be a vapoursynth clip.")
     if clip.format.id == vs.PresetVideoFormat.NONE or clip.width == 0 or clip.height == 0:
         raise TypeError("vs_tiletools.untile: Clip must have constant format and dimensions.")
+    if isinstance(fade, str) and fade != "inner":
+        raise ValueError("vs_tiletools.untile: Fade must be True, False, or 'inner'.")
+    inner = isinstance(fade, str)
 
     # input clip props
     tile_width  = clip.width
     tile_height = clip.height
     clip_format = clip.format
     num_frames  = clip.num_frames
-    sub_w       = 1 << (clip_format.subsampling_w or 0)
-    sub_h       = 1 << (clip_format.subsampling_h or 0)
+    sub_w       = sub_factors[clip_format.subsampling_w]
+    sub_h       = sub_factors[clip_format.subsampling_h]
     prop_key    = "tiletools_tileprops"
     max_tiles   = 1024
 
@@ -982,10 +1161,7 @@ def untile(clip, fade=False, full_width=None, full_height=None, overlap=None):
         orig_height = int(full_height)
 
         # subsampling checks
-        _check_modulus(overlap_width, sub_w, "Overlap", "untile", clip_format)
-        _check_modulus(overlap_height, sub_h, "Overlap", "untile", clip_format)
-        _check_modulus(orig_width, sub_w, "Full_width", "untile", clip_format)
-        _check_modulus(orig_height, sub_h, "Full_height", "untile", clip_format)
+        _check_moduli(clip_format, "untile", w=(("Overlap", overlap_width), ("Full_width", orig_width)), h=(("Overlap", overlap_height), ("Full_height", orig_height)))
 
         # strides
         stride_x = tile_width  - overlap_width
@@ -994,8 +1170,8 @@ def untile(clip, fade=False, full_width=None, full_height=None, overlap=None):
             raise ValueError("vs_tiletools.untile: Overlap must be smaller than tile size.")
 
         # grid size
-        tiles_x = 1 + (0 if orig_width  <= tile_width  else (orig_width  - tile_width  + stride_x - 1) // stride_x)
-        tiles_y = 1 + (0 if orig_height <= tile_height else (orig_height - tile_height + stride_y - 1) // stride_y)
+        tiles_x = _grid(orig_width,  tile_width,  stride_x)
+        tiles_y = _grid(orig_height, tile_height, stride_y)
         assembled_width  = tile_width  + (tiles_x - 1) * stride_x
         assembled_height = tile_height + (tiles_y - 1) * stride_y
         pad_r = max(0, assembled_width  - orig_width)
@@ -1003,13 +1179,11 @@ def untile(clip, fade=False, full_width=None, full_height=None, overlap=None):
 
     else:
         # check for tile props
-        f0 = clip.get_frame(0)
-        if prop_key not in f0.props:
+        cfg = _get_props(clip, prop_key)
+        if cfg is None:
             raise KeyError("vs_tiletools.untile: Clip has no tile props. Did you pass the right clip? Were some frame props deleted? You can also provide them manually.")
 
         # stored tile props
-        raw = f0.props[prop_key]
-        cfg = json.loads(raw.decode() if isinstance(raw, (bytes, bytearray)) else raw)
         orig_tile_w    = int(cfg["tile_w"])
         orig_tile_h    = int(cfg["tile_h"])
         orig_overlap_w = int(cfg["overlap_w"])
@@ -1055,8 +1229,8 @@ def untile(clip, fade=False, full_width=None, full_height=None, overlap=None):
             pad_r   = 0
             pad_b   = 0
         else:
-            tiles_x          = 1 + (0 if orig_width  <= tile_width  else (orig_width  - tile_width  + stride_x - 1) // stride_x)
-            tiles_y          = 1 + (0 if orig_height <= tile_height else (orig_height - tile_height + stride_y - 1) // stride_y)
+            tiles_x          = _grid(orig_width,  tile_width,  stride_x)
+            tiles_y          = _grid(orig_height, tile_height, stride_y)
             assembled_width  = tile_width  + (tiles_x - 1) * stride_x
             assembled_height = tile_height + (tiles_y - 1) * stride_y
             pad_r            = max(0, assembled_width  - orig_width)
@@ -1071,104 +1245,153 @@ def untile(clip, fade=False, full_width=None, full_height=None, overlap=None):
     if num_tiles == 1:
         parts = [clip]
     else:
-        parts = [core.std.SelectEvery(clip, cycle=num_tiles, offsets=i, modify_duration=False) for i in range(num_tiles)]
-
-    def _crop_tiles(clip, col, row):
-        # split and crop overlap
-        def _split_overlap(overlap, unit):
-            if overlap <= 0:
-                return 0, 0
-            if unit > 1:
-                overlap -= overlap % unit
-            h = overlap // 2
-            if unit > 1:
-                h -= h % unit
-            a = h
-            b = overlap - a
-            return a, b
-
-        half_w_l, half_w_r = _split_overlap(overlap_width,  sub_w)
-        half_h_t, half_h_b = _split_overlap(overlap_height, sub_h)
-
-        crop_left   = half_w_l if col > 0 else 0
-        crop_right  = half_w_r if col < tiles_x - 1 else 0
-        crop_top    = half_h_t if row > 0 else 0
-        crop_bottom = half_h_b if row < tiles_y - 1 else 0
-
-        if crop_left or crop_right or crop_top or crop_bottom:
-            return core.std.Crop(clip, left=crop_left, right=crop_right, top=crop_top, bottom=crop_bottom)
-        return clip
+        select_every = core.std.SelectEvery  # resolve the plugin function once instead of per tile
+        parts = [select_every(clip, cycle=num_tiles, offsets=i, modify_duration=False) for i in range(num_tiles)]
+
+    # split overlaps into the parts cropped from each side once, kept a multiple of subsampling which is always a power of 2
+    split_w  = overlap_width  & ~(sub_w - 1)
+    split_h  = overlap_height & ~(sub_h - 1)
+    half_w_l = (split_w >> 1) & ~(sub_w - 1)
+    half_h_t = (split_h >> 1) & ~(sub_h - 1)
+    half_w_r = split_w - half_w_l
+    half_h_b = split_h - half_h_t
 
     # mask format and peak 
-    mask_format = core.query_video_format(color_family=vs.GRAY, sample_type=clip_format.sample_type, bits_per_sample=clip_format.bits_per_sample, subsampling_w=0, subsampling_h=0)
+    mask_format = _qvf(vs.GRAY, clip_format.sample_type, clip_format.bits_per_sample, 0, 0)
     mask_peak   = (1.0 if clip_format.sample_type == vs.FLOAT else (1 << clip_format.bits_per_sample) - 1)
 
-    # generate masks for fading
+    # blend sizes, inner fade discards the outer quarter of the overlap on each side and only blends the middle half
+    cut_w  = (overlap_width  // 4) - (overlap_width  // 4) % sub_w if inner else 0
+    cut_h  = (overlap_height // 4) - (overlap_height // 4) % sub_h if inner else 0
+    fade_w = overlap_width  - 2 * cut_w
+    fade_h = overlap_height - 2 * cut_h
+
+    # generate masks for fading, cached since every seam of a direction has the same mask size
+    # the gradient is resized for a single frame and looped, so the resizer runs once instead of on every frame
+    def _loop_mask(mask):
+        core.std.SetVideoCache(mask, mode=1)
+        return core.std.Loop(mask, times=clip.num_frames)
+
+    @functools.lru_cache(maxsize=None)
     def _mask_horizontal(h):
-        if overlap_width <= 0:
+        if fade_w <= 0:
             return None
-        black = core.std.BlankClip(clip=clip, format=mask_format.id, width=1, height=1, color=[0], keep=True)
-        white = core.std.BlankClip(clip=clip, format=mask_format.id, width=1, height=1, color=[mask_peak], keep=True)
+        black = core.std.BlankClip(clip=clip, format=mask_format.id, width=1, height=1, length=1, color=[0], keep=True)
+        white = core.std.BlankClip(clip=clip, format=mask_format.id, width=1, height=1, length=1, color=[mask_peak], keep=True)
         gradient = core.std.StackHorizontal([black, white])
-        return core.resize.Bilinear(gradient, width=overlap_width, height=h, src_left=0.5, src_width=1.0, src_top=0.0,  src_height=1.0)
+        return _loop_mask(core.resize.Bilinear(gradient, width=fade_w, height=h, src_left=0.5, src_width=1.0, src_top=0.0,  src_height=1.0))
 
+    @functools.lru_cache(maxsize=None)
     def _mask_vertical(w):
-        if overlap_height <= 0:
+        if fade_h <= 0:
             return None
-        black = core.std.BlankClip(clip=clip, format=mask_format.id, width=1, height=1, color=[0], keep=True)
-        white = core.std.BlankClip(clip=clip, format=mask_format.id, width=1, height=1, color=[mask_peak], keep=True)
+        black = core.std.BlankClip(clip=clip, format=mask_format.id, width=1, height=1, length=1, color=[0], keep=True)
+        white = core.std.BlankClip(clip=clip, format=mask_format.id, width=1, height=1, length=1, color=[mask_peak], keep=True)
         gradient = core.std.StackVertical([black, white])
-        return core.resize.Bilinear(gradient, width=w, height=overlap_height, src_top=0.5,  src_height=1.0, src_left=0.0, src_width=1.0)
+        return _loop_mask(core.resize.Bilinear(gradient, width=w, height=fade_h, src_top=0.5,  src_height=1.0, src_left=0.0, src_width=1.0))
 
     # do fading
     def _fade_horizontal(left, right):
         # fade two tiles horizontally
-        if overlap_width <= 0:
+        if cut_w:
+            left  = core.std.Crop(left,  right=cut_w)
+            right = core.std.Crop(right, left=cut_w)
+        if fade_w <= 0:
             return core.std.StackHorizontal([left, right])
-        keep_left      = core.std.Crop(left,  right=overlap_width)
-        keep_right     = core.std.Crop(right, left=overlap_width)
-        overlap_left   = core.std.Crop(left,  left=left.width - overlap_width)
-        overlap_right  = core.std.Crop(right, right=right.width - overlap_width)
-        mask           = _mask_horizontal(left.height)
-        overlap        = _maskedmerge(overlap_left, overlap_right, mask)
-        return core.std.StackHorizontal([keep_left, overlap, keep_right])
+        keep_left      = core.std.Crop(left,  right=fade_w)
+        keep_right     = core.std.Crop(right, left=fade_w)
+        overlap_left   = core.std.Crop(left,  left=left.width - fade_w)
+        overlap_right  = core.std.Crop(right, right=right.width - fade_w)
+        return core.std.StackHorizontal([keep_left, _blend_horizontal(overlap_left, overlap_right), keep_right])
+
+    def _blend_horizontal(overlap_left, overlap_right):
+        # blend two overlap strips from left to right
+        if hasattr(core, "akarin"):  # weight by pixel position in a single pass instead of building and merging a mask
+            return core.akarin.Expr([overlap_left, overlap_right], _fade_expr(overlap_left, horizontal=True))
+        return _maskedmerge(overlap_left, overlap_right, _mask_horizontal(overlap_left.height))
 
     def _fade_vertical(top, bottom):
         # fade two rows vertically
-        if overlap_height <= 0:
+        if cut_h:
+            top    = core.std.Crop(top,    bottom=cut_h)
+            bottom = core.std.Crop(bottom, top=cut_h)
+        if fade_h <= 0:
             return core.std.StackVertical([top, bottom])
-        keep_top       = core.std.Crop(top,    bottom=overlap_height)
-        keep_bottom    = core.std.Crop(bottom, top=overlap_height)
-        overlap_top    = core.std.Crop(top,    top=top.height - overlap_height)
-        overlap_bottom = core.std.Crop(bottom, bottom=bottom.height - overlap_height)
-        mask           = _mask_vertical(top.width)
-        overlap        = _maskedmerge(overlap_top, overlap_bottom, mask)
-        return core.std.StackVertical([keep_top, overlap, keep_bottom])
+        keep_top       = core.std.Crop(top,    bottom=fade_h)
+        keep_bottom    = core.std.Crop(bottom, top=fade_h)
+        overlap_top    = core.std.Crop(top,    top=top.height - fade_h)
+        overlap_bottom = core.std.Crop(bottom, bottom=bottom.height - fade_h)
+        return core.std.StackVertical([keep_top, _blend_vertical(overlap_top, overlap_bottom), keep_bottom])
+
+    def _blend_vertical(overlap_top, overlap_bottom):
+        # blend two overlap strips from top to bottom
+        if hasattr(core, "akarin"):
+            return core.akarin.Expr([overlap_top, overlap_bottom], _fade_expr(overlap_top, horizontal=False))
+        return _maskedmerge(overlap_top, overlap_bottom, _mask_vertical(overlap_top.width))
+
+    def _stack_faded(items, horizontal):
+        # stack tiles or rows once from their kept middles and the blended seams between neighbours, only valid if neighbouring seams don't touch
+        size  = tile_width if horizontal else tile_height
+        cut   = cut_w      if horizontal else cut_h
+        blend = fade_w     if horizontal else fade_h
+        seam  = cut + blend  # pixels used up by a seam on each side
+
+        def _cut(item, start, end):
+            if not (start or end):
+                return item
+            return core.std.Crop(item, left=start, right=end) if horizontal else core.std.Crop(item, top=start, bottom=end)
+
+        pieces = []
+        for k, item in enumerate(items):
+            if k > 0 and blend > 0:
+                before = _cut(items[k - 1], size - seam, cut)
+                after  = _cut(item, cut, size - seam)
+                pieces.append(_blend_horizontal(before, after) if horizontal else _blend_vertical(before, after))
+            start = seam if k > 0 else 0
+            end   = seam if k < len(items) - 1 else 0
+            if start + end < size:
+                pieces.append(_cut(item, start, end))
+        return core.std.StackHorizontal(pieces) if horizontal else core.std.StackVertical(pieces)
 
     if not fade:
-        # crop half overlaps and stack
-        rows = []
-        for j in range(tiles_y):
-            row_tiles = [_crop_tiles(parts[j * tiles_x + i], i, j) for i in range(tiles_x)]
+        # crop half overlaps and stack, vertical overlaps are cropped once per row instead of once per tile, padding is cropped from the edge tiles
+        # crop amounts per column and row only depend on the position, so they are computed once up front
+        col_crops = [(half_w_l if i else 0, half_w_r if i < tiles_x - 1 else pad_r) for i in range(tiles_x)]
+        row_crops = [(half_h_t if j else 0, half_h_b if j < tiles_y - 1 else pad_b) for j in range(tiles_y)]
+        std_crop  = core.std.Crop
+        rows      = []
+        for j, (crop_top, crop_bottom) in enumerate(row_crops):
+            row_parts = parts[j * tiles_x:(j + 1) * tiles_x]
+            row_tiles = [std_crop(tile, left=crop_left, right=crop_right) if crop_left or crop_right else tile for tile, (crop_left, crop_right) in zip(row_parts, col_crops)]
             row = row_tiles[0] if tiles_x == 1 else core.std.StackHorizontal(row_tiles)
-            rows.append(row)
+            rows.append(std_crop(row, top=crop_top, bottom=crop_bottom) if crop_top or crop_bottom else row)
         full = rows[0] if tiles_y == 1 else core.std.StackVertical(rows)
     else:
-        # fade horizontally across each row
+        # fade horizontally across each row, stacked once from kept parts and blended seams if neighbouring seams don't touch
         rows = []
         for j in range(tiles_y):
-            row = parts[j * tiles_x + 0]
-            for i in range(1, tiles_x):
-                row = _fade_horizontal(row, parts[j * tiles_x + i])
+            row_parts = parts[j * tiles_x:(j + 1) * tiles_x]
+            if tiles_x > 1 and 2 * (cut_w + fade_w) <= tile_width:
+                rows.append(_stack_faded(row_parts, horizontal=True))
+                continue
+            row = row_parts[0]
+            for part in row_parts[1:]:
+                row = _fade_horizontal(row, part)
             rows.append(row)
-        # fade vertically across the rows
-        full = rows[0]
-        for j in range(1, tiles_y):
-            full = _fade_vertical(full, rows[j])
 
-    # remove padding if needed
-    if pad_r or pad_b:
-        full = core.std.Crop(full, right=pad_r, bottom=pad_b)
+        # fade vertically across the rows the same way
+        if tiles_y > 1 and 2 * (cut_h + fade_h) <= tile_height:
+            full = _stack_faded(rows, horizontal=False)
+
+        # large overlaps let seams overlap each other, so fade into the rows assembled so far
+        else:
+            full = rows[0]
+            for j in range(1, tiles_y):
+                full = _fade_vertical(full, rows[j])
+
+        # remove padding if needed
+        if pad_r or pad_b:
+            full = core.std.Crop(full, right=pad_r, bottom=pad_b)
 
     return core.std.RemoveFrameProps(full, props=[prop_key])
 
@@ -1236,12 +1459,10 @@ def trim(clip, start=None, end=None, length=None):
 
     # auto trim
     else:
-        f0 = clip.get_frame(0)
-        if prop_key not in f0.props:
+        cfg = _get_props(clip, prop_key)
+        if cfg is None:
             raise KeyError("vs_tiletools.trim: Clip has no temporal pad props. Did you pass the right clip? Were frame props deleted? You can also trim manually.")
 
-        raw       = f0.props[prop_key]
-        cfg       = json.loads(raw.decode() if isinstance(raw, (bytes, bytearray)) else raw)
         start_pad = int(cfg.get("start_pad", 0))
         end_pad   = int(cfg.get("end_pad", 0))
 
@@ -1286,31 +1507,10 @@ def crossfade(clipa, clipb, length=10):
         return core.std.Splice([clipa, clipb])
 
 
-    a_tail = clipa[-length:]
-    b_head = clipb[:length]
+    # blend with a per frame scalar weight if akarin is available, else with a fade mask clip with increasing brightness
+    fade = _fade(clipa[-length:], clipb[:length])
 
-    clip_format = clipa.format
-    fade_levels = []
-    
-    # get correct gray format to match clip
-    mask_format = core.query_video_format(vs.GRAY, clip_format.sample_type, clip_format.bits_per_sample, 0, 0)
-
-    # generate 1 frame long clips with increasing brightness
-    if clipa.format.sample_type == vs.INTEGER:
-        peak = (1 << clipa.format.bits_per_sample) - 1
-        for n in range(length):
-            v = int(round(peak * (n + 1) / (length + 1)))
-            fade_levels.append(core.std.BlankClip(clip=a_tail, format=mask_format.id, length=1, color=[v], keep=True))
-    else:  # float
-        for n in range(length):
-            w = (n + 1) / (length + 1)
-            fade_levels.append(core.std.BlankClip(clip=a_tail, format=mask_format.id, length=1, color=[w], keep=True))
-
-    # splice all levels together to get fade mask clip
-    mask = core.std.Splice(fade_levels)
-
-    # blend and reassemble
-    fade = _maskedmerge(a_tail, b_head, mask)
+    # reassemble
     parts = []
     if clipa.num_frames > length:
         parts.append(clipa[:-length])
@@ -1350,40 +1550,50 @@ def insert_overlaps(clip, length=20, overlap=5, padding="mirror"):
     num_frames  = clip.num_frames
     stride      = length - overlap
 
-    window_list = []
-    start_frame = 0
-    while start_frame < num_frames:
-        end_frame   = min(num_frames - 1, start_frame + length - 1)
-        window_clip = core.std.Trim(clip, first=start_frame, last=end_frame)
-
-        frames_present = end_frame - start_frame + 1
-        frames_missing = length - frames_present
-
-        if frames_missing > 0:
-            pad_mode = padding
-
-            # drop final short window
-            if pad_mode == "discard":
-                break
-
-            # leave shorter as is
-            elif pad_mode is None or (isinstance(pad_mode, str) and pad_mode == "none"):
-                padded_window = window_clip  
-
-            # pad with extend
-            elif (isinstance(pad_mode, str) and pad_mode in {"mirror", "loop", "repeat", "black"}) or isinstance(pad_mode, (Real, list, tuple)):
-                padded_window = _extend_core(window_clip, length=length, mode=pad_mode, write_props=False)
-
-            else:
-                raise ValueError("vs_tiletools.insert_overlaps: Padding must be 'mirror', 'loop', 'repeat', 'black', or a custom color like [128, 128, 128].")
-        
+    # resolve padding once, every short window is padded the same way
+    if padding is None or (isinstance(padding, str) and padding == "none"):
+        pad_mode = None
+    elif isinstance(padding, str) and padding in ("discard", "mirror", "loop", "repeat"):
+        pad_mode = padding
+    elif (isinstance(padding, str) and padding == "black") or isinstance(padding, (Real, list, tuple)):
+        pad_mode = "color"
+        color    = _normalize_color(padding, clip.format, "insert_overlaps")
+        if color is False:
+            raise ValueError("vs_tiletools.insert_overlaps: Padding must be 'mirror', 'loop', 'repeat', 'black', or a custom color like [128, 128, 128].")
+    else:
+        raise ValueError("vs_tiletools.insert_overlaps: Padding must be 'mirror', 'loop', 'repeat', 'black', or a custom color like [128, 128, 128].")
+
+    # drop final short windows up front
+    starts = range(0, num_frames, stride)
+    if pad_mode == "discard":
+        starts = range(0, num_frames - length + 1, stride)
+
+    source      = clip
+    offsets     = []  # source frame for every output frame, so the whole clip is a single remap
+    for start_frame in starts:
+        frames_present = min(length, num_frames - start_frame)
+        offsets.extend(range(start_frame, start_frame + frames_present))
+        if frames_present == length or pad_mode is None:
+            continue
+        missing = range(frames_present, length)
+
+        # pad like extend, but by pointing at frames inside the window
+        if pad_mode == "mirror":
+            period = max(1, 2 * (frames_present - 1))
+            pads   = [t if t < frames_present else period - t for t in (p % period for p in missing)]
+        elif pad_mode == "loop":
+            pads   = [p % frames_present for p in missing]
+        elif pad_mode == "repeat":
+            pads   = [frames_present - 1] * len(missing)
+
+        # solid color, points at a single color frame appended to the source
         else:
-            padded_window = window_clip
-
-        window_list.append(padded_window)
-        start_frame += stride
+            if source is clip:
+                source = clip + _color_frame(clip, color, -1)
+            pads   = [num_frames - start_frame] * len(missing)
+        offsets.extend(start_frame + p for p in pads)
 
-    out = core.std.Splice(window_list)
+    out = _remap(source, offsets)
 
     # window props
     if isinstance(padding, (list, tuple)):
@@ -1394,16 +1604,16 @@ def insert_overlaps(clip, length=20, overlap=5, padding="mirror"):
         pad_tag = padding
     else:
         pad_tag = "none"
+    pad_code = overlap_pads.get(pad_tag, 0)
 
     prop_key = "tiletools_overlapprops"
     cfg = dict(
         orig_length=int(num_frames),
         window_length=int(length),
         overlap=int(overlap),
-        padding=pad_tag,
+        padding=pad_code,
     )
-    cfg_str = json.dumps(cfg, separators=(",", ":"))
-    return core.std.SetFrameProp(out, prop=prop_key, data=[cfg_str])
+    return _set_props(out, prop_key, cfg)
 
 
 def trim_overlaps(clip, fade=False, full_length=None, window_length=None, overlap=None):
@@ -1446,46 +1656,68 @@ def trim_overlaps(clip, fade=False, full_length=None, window_length=None, overla
 
     else:
         # get stored window props
-        f0 = clip.get_frame(0)
-        if prop_key not in f0.props:
+        cfg = _get_props(clip, prop_key)
+        if cfg is None:
             raise KeyError("vs_tiletools.trim_overlaps: Clip has no overlap props. Did you pass the right clip? Were some frame props deleted? You can also provide them manually.")
-
-        # stored window props
-        raw = f0.props[prop_key]
-        cfg = json.loads(raw.decode() if isinstance(raw, (bytes, bytearray)) else raw)
         original_length = int(cfg["orig_length"])
         window_length   = int(cfg["window_length"])
         overlap         = int(cfg["overlap"])
 
-    # split the concatenated clip back into windows
+    # window bounds in the concatenated clip
     num_frames  = clip.num_frames
-    num_windows = (num_frames + window_length - 1) // window_length
-    window_list: list[vs.VideoNode] = []
-    for i in range(num_windows):
-        start = i * window_length
-        end   = min((i + 1) * window_length, num_frames)
-        window_list.append(clip[start:end])
-
-    # remove overlap and reassemble with optional crossfade
-    reassembled = window_list[0]
-    for next_window in window_list[1:]:
+    starts      = range(0, num_frames, window_length)
+    lengths     = [window_length] * (len(starts) - 1) + [num_frames - starts[-1]]  # plain ints, only the last window can be shorter
+    trim        = core.std.Trim
+
+    # remove overlap and reassemble with optional crossfade, collecting pieces for a single flat splice
+    # pieces are trimmed straight from the input clip, so no piece is a trim of a trim
+    parts           = []
+    parts_len       = []
+    tail_first      = 0     # last piece is held back, since the next crossfade needs its end, as a range of the input clip
+    tail_node       = None  # or as a joined node if a fade had to reach back past it
+    tail_len        = lengths[0]
+    reassembled_len = lengths[0]
+    masks           = {}    # ramp masks by fade length, shared by all transitions
+
+    def _tail(offset, length):
+        if tail_first is not None:
+            return trim(clip, first=tail_first + offset, length=length)
+        return tail_node if (offset == 0 and length == tail_len) else tail_node[offset:offset + length]
+
+    for start, next_len in zip(starts[1:], lengths[1:]):
         if fade and overlap > 0:
-            crossfade_length = min(overlap, reassembled.num_frames, next_window.num_frames)
-            if crossfade_length > 0:
-                reassembled = crossfade(reassembled, next_window, crossfade_length)
-            else:
-                reassembled = core.std.Splice([reassembled, next_window])
+            crossfade_length = min(overlap, reassembled_len, next_len)
+            if crossfade_length > tail_len:  # fade reaches back past the last piece on large overlaps, join only the pieces it covers
+                joined = [_tail(0, tail_len)] if tail_len else []
+                while tail_len < crossfade_length:
+                    joined.insert(0, parts.pop())
+                    tail_len += parts_len.pop()
+                tail_node, tail_first = core.std.Splice(joined), None
+            if tail_len > crossfade_length:
+                parts.append(_tail(0, tail_len - crossfade_length))
+                parts_len.append(tail_len - crossfade_length)
+            head = trim(clip, first=start, length=crossfade_length)
+            parts.append(_fade(_tail(tail_len - crossfade_length, crossfade_length), head, masks))  # only the overlap is faded, independent of how much is assembled
+            parts_len.append(crossfade_length)
+            drop = crossfade_length
         else:
-            drop = min(overlap, next_window.num_frames)
-            reassembled = core.std.Splice([reassembled, next_window[drop:]])
+            drop = min(overlap, next_len)
+            if tail_len:
+                parts.append(_tail(0, tail_len))
+                parts_len.append(tail_len)
+        tail_first, tail_len = start + drop, next_len - drop
+        reassembled_len     += next_len - drop
+    if tail_len:
+        parts.append(_tail(0, tail_len))
+    reassembled = core.std.Splice(parts)
 
     # trim to original length
-    final_length = min(original_length, reassembled.num_frames)
+    final_length = min(original_length, reassembled_len)
     out = reassembled[:final_length]
     return core.std.RemoveFrameProps(out, props=[prop_key])
 
 
-def markdups(clip, thresh=0.3):
+def markdups(clip, thresh=0.3, num_stream=4):
     """Marks up to 5 consecutive frames as duplicates if they are near identical, which can later be skipped using `skipdups()`. 
 
     Args:
@@ -1493,6 +1725,8 @@ def markdups(clip, thresh=0.3):
         thresh: Similarity threshold. If the difference between two consecutive frames is lower than this value, the
             frame is marked as a duplicate. If the value is 0, only 100% identical frames will be marked as duplicate.
             Keep it a little above 0 due to noise and compression. The default worked nicely for me on anime.
+        num_stream: Number of GPU streams used to calculate the differences. Lower it if you run out of VRAM,
+            raise it if your GPU is not fully utilized.
     """
     
     # checks
@@ -1503,6 +1737,8 @@ def markdups(clip, thresh=0.3):
     thresh = float(thresh)
     if thresh < 0.0:
         raise ValueError("vs_tiletools.markdups: Threshold can not be negative.")
+    if not isinstance(num_stream, int) or isinstance(num_stream, bool) or num_stream < 1:
+        raise ValueError("vs_tiletools.markdups: Num_stream must be a whole number of at least 1.")
 
     global markdup_id
     thresh   = thresh * 10  # make input tresh values a little smaller
@@ -1510,21 +1746,43 @@ def markdups(clip, thresh=0.3):
     markprop = "tiletools_markprops"
     idprop   = "tiletools_propsrcid"
     diffprop = "_BUTTERAUGLI_INFNorm"
+    statprop = "tiletools_exactdiff"
     
-    measure = core.resize.Bicubic(clip, width=720, height=480) if (clip.width > 720 or clip.height > 480) else clip  # resize to lower res for faster diffs
-    measure = core.vship.BUTTERAUGLI(_backshift(measure, 1)[1], measure, numStream=4, intensity_multiplier=203)      # diff between current frame and previous, vship autoconverts format now
+    # exact difference to the previous frame, cheap compared to butteraugli
+    stats   = core.resize.Point(clip, format=clip.format.replace(bits_per_sample=32)) if clip.format.sample_type == vs.FLOAT and clip.format.bits_per_sample == 16 else clip  # planestats has no fp16
+    prev    = _backshift(stats, 1)[1]
+    planes  = range(clip.format.num_planes)
+    for p in planes:
+        stats = core.std.PlaneStats(stats, prev, plane=p, prop=f"tiletools_stats{p}")
+        core.std.SetVideoCache(stats, mode=0)                            # each stats frame is only read once, no need to cache it
+    exact   = " ".join(f"x.tiletools_stats{p}Diff" for p in planes) + " +" * (len(planes) - 1)
+
+    if thresh == 0:
+        # only identical frames can be marked, so the exact difference is all that is needed and butteraugli is skipped
+        diffprop = statprop                                              # own prop, so the debug overlay doesn't show it as a butteraugli score
+        measure  = core.akarin.PropExpr([stats], lambda: {diffprop: exact})
+    else:
+        measure = clip
+        if clip.width > 720 or clip.height > 480:                        # resize to lower res for faster diffs, bilinear is enough for a diff metric
+            scale   = min(720 / clip.width, 480 / clip.height)           # keep aspect ratio so the metric doesn't see stretched frames
+            mod_w   = sub_factors[clip.format.subsampling_w]
+            mod_h   = sub_factors[clip.format.subsampling_h]
+            measure = core.resize.Bilinear(clip, width=max(mod_w, round(clip.width * scale / mod_w) * mod_w), height=max(mod_h, round(clip.height * scale / mod_h) * mod_h))
+        butter  = core.vship.BUTTERAUGLI(_backshift(measure, 1)[1], measure, numStream=num_stream, intensity_multiplier=203)  # diff between current frame and previous, vship autoconverts format now
+        zero    = core.std.SetFrameProp(measure, prop=diffprop, floatval=0.0)
+        core.std.SetVideoCache(zero, mode=0)                             # only read once by the select
+        measure = core.akarin.Select([butter, zero], [stats], [exact + " 0 ="])  # butteraugli is only requested for frames that are not identical to the previous one
     clip    = core.std.CopyFrameProps(clip, measure, diffprop)           # copy just the needed prop to the original clip
     shifts  = _backshift(clip, max_back - 1)                             # [diff(n), diff(n-1), ..., diff(n-4)]
 
-    expr = "0"
-    for i in reversed(range(max_back)):
-        expr = f"N {i} > src{i}.{diffprop} {thresh} < * 1 {expr} + 0 ?"  # always choose earliest dup under thresh within max_back
-
-    marked  = core.akarin.PropExpr(shifts, lambda: {markprop: expr})     # mark frames with expr
+    expr    = markdup_expr.format(prop=diffprop, thresh=thresh, cmp="<=" if thresh == 0 else "<")  # always choose earliest dup under thresh within max_back, at 0 identical frames count
     this_id = markdup_id
     markdup_id += 1                                                      # increment id for prop clip
-    marked  = core.std.SetFrameProp(marked, prop=idprop, intval=this_id) # set id prop so skipdups can find the prop_src clip from the registry
+    marked  = core.akarin.PropExpr(shifts, lambda: {markprop: expr, idprop: this_id})  # mark frames with expr and set id prop so skipdups can find the prop_src clip from the registry
     markdup_reg[this_id] = marked                                        # add to registry for auto detection in skipdups
+    if len(markdup_reg) > markdup_max:
+        del markdup_reg[next(iter(markdup_reg))]                         # ids only grow, so the first entry is the oldest
+    props_reg[marked]    = {idprop: this_id}                             # remember id for the returned clip, so skipdups can skip get_frame
     return marked
 
 
@@ -1540,7 +1798,8 @@ def skipdups(clip, prop_src=None, debug=False):
     Args:
         clip: Clip with marked duplicates. Any format.
         prop_src: Optional prop source clip. This should be auto-detected. But if the frame props of the first clip
-            got lost, you can set it here manually. It should be the clip directly returned by `markdups()`.
+            got lost, you can set it here manually. It should be the clip directly returned by `markdups()`. Auto-detection
+            only remembers the last 64 `markdups()` calls, set it manually for older ones.
         debug: Overlays the frame number of the selected frame and the difference value to the previous frame onto the output.
             This is useful to finetune the sensitivity threshold in `markdups()`.
     """
@@ -1555,14 +1814,17 @@ def skipdups(clip, prop_src=None, debug=False):
     markprop = "tiletools_markprops"
     idprop   = "tiletools_propsrcid"
     diffprop = "_BUTTERAUGLI_INFNorm"
+    statprop = "tiletools_exactdiff"
 
     if prop_src is None:
-        # get id for prop source clip from first frame
-        f0 = clip.get_frame(0)
-        if idprop not in f0.props:
+        # get id for prop source clip from registry or first frame
+        this_id = _get_props(clip, idprop)
+        if this_id is None:
             raise KeyError("vs_tiletools.skipdups: Clip is missing required props. Did you pass the right clip? Were frame props deleted? Make sure to use markdups first.")
-        this_id  = int(f0.props[idprop])
+        this_id  = int(this_id)
         prop_src = markdup_reg.get(this_id)
+        if prop_src is None:
+            raise KeyError("vs_tiletools.skipdups: Prop source clip is no longer registered, because too many markdups calls followed it. Set prop_src manually.")
 
     if not isinstance(prop_src, vs.VideoNode):
         raise TypeError("vs_tiletools.skipdups: Prop source must be a vapoursynth clip.")
@@ -1575,18 +1837,21 @@ def skipdups(clip, prop_src=None, debug=False):
         clip_format = clip.format
         if clip_format.sample_type == vs.FLOAT and clip_format.bits_per_sample == 16:      # convert to fp32 if input is fp16 for text overlay
             clip = core.resize.Point(clip, format=clip.format.replace(bits_per_sample=32))
-        text = lambda n, c=clip: c.text.Text(f"\n\nChosen replacement frame: {n}", alignment=9, scale=2)
-        clip = core.std.FrameEval(clip, text)                                              # print current frame, will stand still after select if skipped
+        clip = core.akarin.Text([clip], "\n\nChosen replacement frame: {N}", alignment=9, scale=2)  # print current frame, will stand still after select if skipped
     
     choices = _backshift(clip, max_back)                                                   # choices are clip shifted back by 0-max_back
-    expr = f"x.{markprop} {max_back} < x.{markprop} N {max_back} % x.{markprop} min ?"     # if markprop < max_back: skip as much as possible, else (long run) throttle shift so it doesn't slide forever
-    out  = core.akarin.Select(choices, [prop_src], [expr])                                 # each frame selects the clip with an earlier frame if possible
+    out  = core.akarin.Select(choices, [prop_src], [skipdup_expr])                         # each frame selects the clip with an earlier frame if possible
     out  = core.std.CopyFrameProps(out, prop_src, props=["_DurationNum", "_DurationDen"])  # copy original correctly ordered fps props 
     
     if debug:
-        text = lambda n, f, c=out: c.text.Text(f"Difference to previous frame: {f.props[diffprop] / 10:.2f}\nCurrent frame: {n}", alignment=9, scale=2)
-        out  = core.std.FrameEval(out, text, prop_src=[prop_src])                          # round prop to 2 decimal places, divide by 10, render debug overlay
+        def _text(n, f, c=out):
+            if diffprop in f.props:  # butteraugli score, divided by 10 to match the markdups thresh
+                diff = f"Difference to previous frame: {f.props[diffprop] / 10:.2f}"
+            else:                    # thresh 0 only measures the exact pixel difference
+                diff = f"Exact difference to previous frame: {f.props[statprop]:.4f}"
+            return c.text.Text(f"{diff}\nCurrent frame: {n}", alignment=9, scale=2)
+        out  = core.std.FrameEval(out, _text, prop_src=[prop_src])                         # render debug overlay
         if clip_format.sample_type == vs.FLOAT and clip_format.bits_per_sample == 16:
             out = core.resize.Point(out, format=clip.format.replace(bits_per_sample=16))
     
-    return core.std.RemoveFrameProps(out, props=[markprop, idprop, diffprop])
+    return core.std.RemoveFrameProps(out, props=[markprop, idprop, diffprop, statprop])